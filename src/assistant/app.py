@@ -1,43 +1,92 @@
 # -*- coding: utf-8 -*-
 """
 CLI 入口（與 GUI 行為一致的改良版）
-- 仍舊使用 load_memory() 讀 memory_data.json
+- 仍舊使用 load_memory() 讀 memory_data.json（透過 assistant.warmstart 的暖啟動快照，一次讀檔）
 - 使用改良版 SmartSearch（偏置在使用者目錄、內建快取）
 - 在開啟前先做存在性檢查，降低誤學習風險
 - 成功/失敗各自記錄 O/X（正負回饋）
+- --batch：非互動批次查詢，輸出 JSONL（見 assistant.batch）
+- --record-queries（或 config.json record_queries）：記錄查詢供 replay 做延遲回歸
+- --timings：把啟動各階段耗時印到 stderr，並對照 STARTUP_BUDGET_MS
+- 只有用得到才 import（開啟動作、批次、紀錄），讓單次查詢的冷啟動盡量快
 """
 from __future__ import annotations
+import time
+
+_T_IMPORT = time.perf_counter()  # --timings 的起點：其餘模組的 import 從這裡開始算
+
 import argparse
 import sys
 import os
+from typing import TYPE_CHECKING
 
-from assistant.memory.memory_manager import load_memory
-from assistant.search.smart_search import SmartSearch
-from assistant.actions.openers import run_action
+from assistant.warmstart import STARTUP_BUDGET_MS, load_smart_search
+
+if TYPE_CHECKING:
+    from assistant.search.smart_search import SmartSearch
 
 
 def main():
     parser = argparse.ArgumentParser(description="Smart Desktop Assistant (CLI)")
     parser.add_argument("query", nargs="*", help="你要找什麼？(例如: GL-05 預製圖 308)")
     parser.add_argument("--top", type=int, default=10, help="最多顯示幾筆")
+    parser.add_argument("--batch", metavar="FILE", help="批次模式：從檔案讀查詢（- 表示 stdin），每行輸出一筆 JSONL")
+    parser.add_argument("--output", "-o", metavar="FILE", help="批次模式輸出檔（預設 stdout）")
+    parser.add_argument("--workers", type=int, default=None, help="批次模式平行 worker 數（預設 CPU 數）")
+    parser.add_argument("--engine", choices=("memory", "index"), default="memory",
+                        help="批次模式使用的引擎：memory=記憶點，index=電腦索引")
+    parser.add_argument("--record-queries", action="store_true", help="記錄這次查詢到 query_log.jsonl")
+    parser.add_argument("--timings", action="store_true", help="在 stderr 印出啟動各階段耗時")
     args = parser.parse_args()
 
+    if args.batch:
+        from assistant.batch import run_batch
+        sys.exit(run_batch(args.batch, output=args.output, engine_kind=args.engine,
+                           top_k=args.top, workers=args.workers))
+
     query = " ".join(args.query).strip()
     if not query:
         print("請輸入關鍵詞，例如：python -m assistant 預製圖 dwg")
         sys.exit(0)
 
-    items = load_memory()
-    if not items:
+    t_load = time.perf_counter()
+    load_stats: dict = {}
+    engine = load_smart_search(stats=load_stats)
+    if not engine.items:
         print("memory_data.json 是空的或找不到，先放幾個記憶點吧。")
         sys.exit(1)
 
-    engine = SmartSearch(items)
+    t0 = time.perf_counter()
     results = engine.search(query, top_k=args.top)
+    latency_ms = (time.perf_counter() - t0) * 1000.0
+    if args.timings:
+        _print_timings(t_load, t0, latency_ms, load_stats.get("warm", False))
+
+    code, chosen = _choose_and_open(engine, query, results)
+
+    from assistant.querylog import is_enabled, record_query
+    if is_enabled(args.record_queries):
+        record_query(query, args.top, results, latency_ms, "memory", chosen=chosen)
+    sys.exit(code)
+
+
+def _print_timings(t_load: float, t_search: float, search_ms: float, warm: bool) -> None:
+    import_ms = (t_load - _T_IMPORT) * 1000.0
+    load_ms = (t_search - t_load) * 1000.0
+    # process_time 含直譯器本身啟動的 CPU 時間，當作「從程序開始」的近似
+    total_ms = time.process_time() * 1000.0
+    print(f"[timings] import={import_ms:.1f}ms  load={load_ms:.1f}ms ({'warm' if warm else 'cold'})  "
+          f"search={search_ms:.1f}ms  process_cpu={total_ms:.1f}ms  budget={STARTUP_BUDGET_MS:.0f}ms",
+          file=sys.stderr)
+    if total_ms > STARTUP_BUDGET_MS:
+        print("[timings] ⚠️ 超出啟動預算", file=sys.stderr)
 
+
+def _choose_and_open(engine: SmartSearch, query: str, results) -> tuple[int, dict | None]:
+    """列出結果、讓使用者挑一筆開啟並記錄回饋；回傳 (exit code, 選中的項目)"""
     if not results:
         print(f"找不到與「{query}」相關的項目。")
-        sys.exit(0)
+        return 0, None
 
     print(f"\n🔎 查詢：「{query}」  → 顯示前 {len(results)} 筆")
     for i, (s, it) in enumerate(results, 1):
@@ -47,13 +96,13 @@ def main():
 
     try:
         choice = input("\n要開哪一個？(輸入編號；直接 Enter 跳過)：").strip()
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, EOFError):
         print()
-        sys.exit(0)
+        return 0, None
 
     if not choice:
         print("已略過開啟。")
-        sys.exit(0)
+        return 0, None
 
     try:
         idx = int(choice)
@@ -61,7 +110,9 @@ def main():
             raise ValueError
     except ValueError:
         print("輸入的編號不合法。")
-        sys.exit(1)
+        return 1, None
+
+    from assistant.actions.openers import run_action
 
     score, chosen = results[idx - 1]
     target_path = (chosen.get("path") or "").strip()
@@ -79,9 +130,10 @@ def main():
     if ok and (path_exists or target_path):
         engine.learn_positive(query, chosen)
         print("✅ 已開啟，並記錄為正向回饋。")
-    else:
-        engine.learn_negative(query, chosen)
-        print("⚠️ 開啟失敗（或目標無效），已記錄為負向回饋。")
+        return 0, chosen
+    engine.learn_negative(query, chosen)
+    print("⚠️ 開啟失敗（或目標無效），已記錄為負向回饋。")
+    return 0, None  # 開啟失敗不算選中
 
 
 if __name__ == "__main__":
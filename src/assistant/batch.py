@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+批次查詢（非互動）
+- 從檔案或 stdin 讀查詢，每行一筆：純文字，或 JSON {"query", "top_k", "id", "expected"}
+- 引擎只載入一次，交給 worker pool 平行跑；結果依輸入順序輸出成 JSONL
+- 不開啟任何項目、也不記錄正負回饋
+- 有 expected（期望出現在 Top-K 的 path）時會標出 missing/ok，任何一筆不 ok 則回傳 1
+"""
+from __future__ import annotations
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+# worker 端持有的引擎（initializer 設定一次）
+_ENGINE = None
+
+
+def load_engine(kind: str):
+    """memory：記憶點 + SmartSearch（CLI 預設）；index：Computer_mapping.json + SearchEngine（GUI 同款）"""
+    from assistant.warmstart import load_search_engine, load_smart_search
+    if kind == "memory":
+        return load_smart_search()
+    if kind == "index":
+        return load_search_engine()
+    raise ValueError(f"unknown engine: {kind}")
+
+
+def _init_worker(engine) -> None:
+    global _ENGINE
+    _ENGINE = engine
+
+
+def parse_queries(lines: Iterable[str], default_top: int) -> Iterator[Dict[str, Any]]:
+    for lineno, raw in enumerate(lines, 1):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            try:
+                obj = json.loads(line)
+            except ValueError as e:
+                yield {"line": lineno, "error": f"invalid json: {e}"}
+                continue
+            q = str(obj.get("query") or "").strip()
+            if not q:
+                yield {"line": lineno, "error": "missing query"}
+                continue
+            try:
+                k = default_top if obj.get("top_k") is None else int(obj["top_k"])
+            except (TypeError, ValueError):
+                yield {"line": lineno, "error": f"invalid top_k: {obj.get('top_k')!r}"}
+                continue
+            if k <= 0:
+                yield {"line": lineno, "error": f"top_k must be positive: {k}"}
+                continue
+            job = {"line": lineno, "id": obj.get("id"), "query": q, "top_k": k}
+            # 只有明確給了 expected 才做 Top-K 檢查（才會有 ok/missing）；null 與沒給相同
+            expected = obj.get("expected")
+            if expected is not None:
+                if isinstance(expected, str):
+                    expected = [expected]
+                elif not isinstance(expected, list):
+                    yield {"line": lineno, "error": f"expected must be a path or a list of paths: {expected!r}"}
+                    continue
+                job["expected"] = [str(p) for p in expected]
+            yield job
+        else:
+            yield {"line": lineno, "query": line, "top_k": default_top}
+
+
+def _result_row(rank: int, score: float, it: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "rank": rank,
+        "score": round(score, 6),
+        "path": it.get("path") or "",
+        "description": it.get("description") or it.get("name") or "",
+    }
+
+
+def run_one(job: Dict[str, Any]) -> Dict[str, Any]:
+    out = {k: v for k, v in job.items() if v is not None}
+    if "error" in job:
+        return out
+    t0 = time.perf_counter()
+    try:
+        results = _ENGINE.search(job["query"], top_k=job["top_k"])
+    except Exception as e:
+        out["error"] = f"{type(e).__name__}: {e}"
+        return out
+    out["elapsed_ms"] = round((time.perf_counter() - t0) * 1000.0, 3)
+    out["results"] = [_result_row(i, s, it) for i, (s, it) in enumerate(results, 1)]
+    if "expected" in job:
+        got = {r["path"] for r in out["results"]}
+        out["missing"] = [p for p in job["expected"] if p not in got]
+        out["ok"] = not out["missing"]
+    return out
+
+
+def _open_input(src: str) -> TextIO:
+    if src == "-":
+        return sys.stdin
+    return open(src, "r", encoding="utf-8")
+
+
+def run_batch(src: str, output: Optional[str] = None, engine_kind: str = "memory",
+              top_k: int = 10, workers: Optional[int] = None) -> int:
+    # 參數與輸入先驗證，錯了就不必載入引擎
+    if top_k <= 0:
+        print(f"batch: --top 必須是正整數：{top_k}", file=sys.stderr)
+        return 2
+    try:
+        fin = _open_input(src)
+    except OSError as e:
+        print(f"batch: 無法讀取輸入 {src}：{e.strerror or e}", file=sys.stderr)
+        return 2
+    try:
+        jobs: List[Dict[str, Any]] = list(parse_queries(fin, top_k))
+    finally:
+        if fin is not sys.stdin:
+            fin.close()
+
+    t0 = time.perf_counter()
+    engine = load_engine(engine_kind).warm()  # 先在主程序載入一次，worker 直接拿到準備好的引擎
+    load_ms = (time.perf_counter() - t0) * 1000.0
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    fout = sys.stdout if output in (None, "-") else open(output, "w", encoding="utf-8")
+    n_err = n_fail = 0
+    try:
+        if workers == 1 or len(jobs) <= 1:
+            _init_worker(engine)
+            rows: Iterable[Dict[str, Any]] = map(run_one, jobs)
+            pool = None
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(engine,))
+            chunksize = max(1, len(jobs) // (workers * 8))
+            rows = pool.map(run_one, jobs, chunksize=chunksize)
+        try:
+            for row in rows:
+                if "error" in row:
+                    n_err += 1
+                elif row.get("ok") is False:
+                    n_fail += 1
+                fout.write(json.dumps(row, ensure_ascii=False) + "\n")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    finally:
+        if fout is not sys.stdout:
+            fout.close()
+        else:
+            fout.flush()
+
+    total_ms = (time.perf_counter() - t0) * 1000.0
+    print(f"batch: {len(jobs)} 筆查詢，引擎載入 {load_ms:.0f} ms，總計 {total_ms:.0f} ms，"
+          f"workers={workers}，錯誤 {n_err}，未命中期望 {n_fail}", file=sys.stderr)
+    return 1 if (n_err or n_fail) else 0
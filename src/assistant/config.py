@@ -8,6 +8,10 @@ os.makedirs(APP_DIR, exist_ok=True)
 MAPPING_PATH = os.path.join(APP_DIR, "Computer_mapping.json")
 FEEDBACK_PATH = os.path.join(APP_DIR, "feedback.json")
 CONFIG_PATH = os.path.join(APP_DIR, "config.json")
+QUERY_LOG_PATH = os.path.join(APP_DIR, "query_log.jsonl")
+# 暖啟動快照（assistant.warmstart）：記憶點 / 電腦索引各一份
+WARM_MEMORY_PATH = os.path.join(APP_DIR, "warm_memory.pickle")
+WARM_INDEX_PATH = os.path.join(APP_DIR, "warm_index.pickle")
 
 DEFAULT_ROOTS = [
     os.path.join(os.path.expanduser("~"), "Desktop"),
@@ -29,6 +33,10 @@ class UserConfig:
     exclude_dir_names: list[str]
     exclude_file_exts: list[str]
     refresh_days: int = 14  # 超過 N 天提示重建索引
+    record_queries: bool = False  # 記錄查詢到 query_log.jsonl（供 replay 做延遲回歸）
+    bias_half_life_days: float = 90.0  # 回饋計數的半衰期（天），越近的點擊權重越高
+    bias_max_items: int = 5000  # item_bias 最多保留幾筆
+    bias_max_tokens: int = 5000  # token_bias 最多保留幾筆
 
 def load_user_config() -> UserConfig:
     if os.path.exists(CONFIG_PATH):
@@ -39,6 +47,10 @@ def load_user_config() -> UserConfig:
             "exclude_dir_names": data.get("exclude_dir_names", list(EXCLUDE_DIR_NAMES)),
             "exclude_file_exts": data.get("exclude_file_exts", list(EXCLUDE_FILE_EXTS)),
             "refresh_days": data.get("refresh_days", 14),
+            "record_queries": bool(data.get("record_queries", False)),
+            "bias_half_life_days": float(data.get("bias_half_life_days", 90.0)),
+            "bias_max_items": int(data.get("bias_max_items", 5000)),
+            "bias_max_tokens": int(data.get("bias_max_tokens", 5000)),
         })
     cfg = UserConfig(DEFAULT_ROOTS, list(EXCLUDE_DIR_NAMES), list(EXCLUDE_FILE_EXTS))
     with open(CONFIG_PATH, "w", encoding="utf-8") as f:
@@ -52,3 +64,11 @@ def mapping_is_stale() -> bool:
     mtime = os.path.getmtime(MAPPING_PATH)
     days = (time.time() - mtime) / 86400
     return days > cfg.refresh_days
+
+def file_signature(path: str) -> tuple[int, int] | None:
+    """(mtime_ns, size)；檔案不存在回傳 None。用來判斷快取/快照是否過期"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
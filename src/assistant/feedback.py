@@ -1,6 +1,12 @@
 from __future__ import annotations
-import json, os
-from .config import FEEDBACK_PATH
+import json, os, time
+from typing import Callable, Iterable
+from .config import FEEDBACK_PATH, load_user_config, file_signature
+
+# 偏置表格式：{"item_bias": {path: e}, "token_bias": {token: e}, "half_life_days": N}
+# e = {"pos": 計數, "neg": 計數, "t": 最後更新時間}；計數依半衰期隨時間衰減
+# （舊格式沒有 "t" 的 entry 在下一次 compact 時才開始計時）
+MIN_WEIGHT = 0.05  # 衰減到 pos+neg 低於此值的 entry 直接丟掉
 
 def load_all() -> dict:
     if os.path.exists(FEEDBACK_PATH):
@@ -12,33 +18,127 @@ def save_all(d: dict) -> None:
     with open(FEEDBACK_PATH, "w", encoding="utf-8") as f:
         json.dump(d, f, ensure_ascii=False, indent=2)
 
-def mark_item(path: str, positive: bool):
+# -------------------------------
+# 時間衰減 / 容量上限
+# -------------------------------
+def decay_factor(e: dict, now: float, half_life_days: float | None) -> float:
+    t = e.get("t")
+    if t is None or not half_life_days or half_life_days <= 0:
+        return 1.0
+    return 0.5 ** (max(0.0, now - float(t)) / (half_life_days * 86400.0))
+
+def decayed_counts(e: dict, now: float, half_life_days: float | None) -> tuple[float, float]:
+    f = decay_factor(e, now, half_life_days)
+    return float(e.get("pos", 0)) * f, float(e.get("neg", 0)) * f
+
+def bump(table: dict, key: str, positive: bool, now: float, half_life_days: float | None) -> None:
+    """先把舊計數衰減到現在，再 +1"""
+    pos, neg = decayed_counts(table.get(key) or {}, now, half_life_days)
+    if positive: pos += 1
+    else: neg += 1
+    table[key] = {"pos": round(pos, 4), "neg": round(neg, 4), "t": round(now, 1)}
+
+def evict(table: dict, cap: int, now: float, half_life_days: float | None) -> None:
+    """丟掉衰減到幾乎為 0 的 entry；超過 cap 時從權重最低、最久沒用的開始淘汰"""
+    weights = {}
+    for k, e in table.items():
+        e.setdefault("t", round(now, 1))
+        pos, neg = decayed_counts(e, now, half_life_days)
+        weights[k] = pos + neg
+    for k, w in weights.items():
+        if w < MIN_WEIGHT:
+            del table[k]
+    if cap > 0 and len(table) > cap:
+        order = sorted(table, key=lambda k: (weights[k], float(table[k].get("t") or 0)))
+        for k in order[:len(table) - cap]:
+            del table[k]
+
+def compact(data: dict, half_life_days: float, max_items: int, max_tokens: int,
+            valid_paths: Iterable[str] | None = None, now: float | None = None) -> dict:
+    now = time.time() if now is None else now
+    ib = data.setdefault("item_bias", {})
+    tb = data.setdefault("token_bias", {})
+    if valid_paths is not None:
+        valid = set(valid_paths)
+        for p in [p for p in ib if p not in valid]:
+            del ib[p]
+    evict(ib, max_items, now, half_life_days)
+    evict(tb, max_tokens, now, half_life_days)
+    data["half_life_days"] = half_life_days
+    return data
+
+def _compact_with_config(data: dict, valid_paths: Iterable[str] | None = None) -> dict:
+    cfg = load_user_config()
+    return compact(data, cfg.bias_half_life_days, cfg.bias_max_items, cfg.bias_max_tokens, valid_paths)
+
+# -------------------------------
+# 寫入
+# -------------------------------
+def mark_item(path: str, positive: bool) -> dict:
     data = load_all()
-    entry = data.setdefault("item_bias", {}).setdefault(path, {"pos": 0, "neg": 0})
-    if positive: entry["pos"] += 1
-    else: entry["neg"] += 1
+    bump(data.setdefault("item_bias", {}), path, positive, time.time(), load_user_config().bias_half_life_days)
+    data = _compact_with_config(data)
     save_all(data)
+    return data
 
-def mark_tokens(tokens: list[str], positive: bool):
+def mark_tokens(tokens: list[str], positive: bool) -> dict:
     data = load_all()
     tb = data.setdefault("token_bias", {})
+    now, hl = time.time(), load_user_config().bias_half_life_days
     for t in tokens:
-        e = tb.setdefault(t, {"pos": 0, "neg": 0})
-        if positive: e["pos"] += 1
-        else: e["neg"] += 1
+        bump(tb, t, positive, now, hl)
+    data = _compact_with_config(data)
     save_all(data)
+    return data
+
+def prune_missing(valid_paths: Iterable[str]) -> None:
+    """移除 mapping 中已不存在的 path（重建索引後呼叫）"""
+    if not os.path.exists(FEEDBACK_PATH):
+        return
+    save_all(_compact_with_config(load_all(), valid_paths))
+
+# -------------------------------
+# 讀取（搜尋時用快照）
+# -------------------------------
+class BiasCache:
+    """
+    偏置檔的快照快取：檔案 (mtime, size) 沒變就不重新 json.load
+    version 只在從磁碟重新載入時 +1；自己剛寫入的內容用 prime() 放回來，不算重新載入
+    """
+    def __init__(self, path: str = FEEDBACK_PATH, loader: Callable[[], dict] = load_all):
+        self.path = path
+        self.loader = loader
+        self.sig: tuple[int, int] | None = None
+        self.data: dict | None = None
+        self.version = 0
 
-def get_bias_for_item_from_snapshot(snapshot: dict, path: str) -> float:
+    def get(self) -> dict:
+        sig = file_signature(self.path)
+        if self.data is None or sig != self.sig:
+            self.data = self.loader()
+            self.sig = sig
+            self.version += 1
+        return self.data
+
+    def prime(self, data: dict) -> None:
+        self.data = data
+        self.sig = file_signature(self.path)
+
+def get_bias_for_item_from_snapshot(snapshot: dict, path: str, now: float | None = None) -> float:
     e = snapshot.get("item_bias", {}).get(path)
     if not e: return 1.0
-    return (1.0 + e.get("pos", 0)) / (1.0 + e.get("neg", 0))
+    pos, neg = decayed_counts(e, time.time() if now is None else now, snapshot.get("half_life_days"))
+    return (1.0 + pos) / (1.0 + neg)
 
-def get_bias_for_tokens_from_snapshot(snapshot: dict, tokens: list[str]) -> float:
+def get_bias_for_tokens_from_snapshot(snapshot: dict, tokens: list[str], now: float | None = None) -> float:
     tb = snapshot.get("token_bias", {})
-    pos = neg = 0
+    hl = snapshot.get("half_life_days")
+    now = time.time() if now is None else now
+    pos = neg = 0.0
     for t in tokens:
         e = tb.get(t)
         if e:
-            pos += e.get("pos", 0)
-            neg += e.get("neg", 0)
+            p, n = decayed_counts(e, now, hl)
+            pos += p
+            neg += n
     return (1.0 + pos) / (1.0 + neg)
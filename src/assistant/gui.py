@@ -1,22 +1,26 @@
 from __future__ import annotations
-import tkinter as tk
-from tkinter import ttk, messagebox
+import time
 
 # === 新增：用我們自己的索引與搜尋 ===
 from assistant.indexer import ensure_index
-from assistant.search_engine import SearchEngine
-from assistant.semantics import tokenize
-from assistant.feedback import mark_item, mark_tokens
+from assistant.warmstart import load_search_engine
+from assistant.querylog import is_enabled, record_query
 
 # 仍然沿用你原本的開啟動作
 from assistant.actions.openers import run_action
 
 
 def run_gui():
+    # tkinter 很重，只在真的要開視窗時才載入
+    import tkinter as tk
+    from tkinter import ttk, messagebox
+
     # 1) 確保電腦索引存在（首跑會建 Computer_mapping.json）
     ensure_index(force=False)
 
-    engine = SearchEngine()
+    # 2) mapping 沒變就直接讀暖啟動快照，不必再 json.load 整份 mapping
+    engine = load_search_engine()
+    recording = is_enabled()
 
     root = tk.Tk()
     root.title("Smart Desktop Assistant")
@@ -43,15 +47,31 @@ def run_gui():
     # 在 tree 上掛結果
     tree.results = []
 
+    # 查詢紀錄：等到使用者成功開啟某筆 / 標記 O、換下一個查詢或關窗時才寫入（才知道選了哪筆）
+    # 開啟失敗與標記 X 不算選中，紀錄留著等下一個動作
+    pending = {}
+
+    def flush_pending(chosen=None):
+        if not pending:
+            return
+        record_query(pending["query"], pending["top_k"], pending["results"],
+                     pending["latency_ms"], "index", chosen=chosen)
+        pending.clear()
+
     def search():
         q = query_var.get().strip()
+        flush_pending()
         for i in tree.get_children():
             tree.delete(i)
         tree.results.clear()
         if not q:
             status.set("請輸入關鍵詞")
             return
+        t0 = time.perf_counter()
         results = engine.search(q, top_k=20)
+        if recording:
+            pending.update(query=q, top_k=20, results=results,
+                           latency_ms=(time.perf_counter() - t0) * 1000.0)
         if not results:
             status.set(f"找不到與「{q}」相關的項目")
             return
@@ -68,14 +88,13 @@ def run_gui():
         score, chosen = tree.results[idx]
         ok = run_action(chosen.get("action") or "open_folder", chosen.get("path") or "")
         if ok:
+            flush_pending(chosen)
             # 預設開啟算正向一次
-            mark_item(chosen.get("path",""), positive=True)
-            mark_tokens(tokenize(query_var.get()), positive=True)
+            engine.record_feedback(query_var.get(), chosen, positive=True)
             messagebox.showinfo("已開啟", "✅ 已開啟並記錄正向回饋")
             status.set("已開啟（+正向）")
         else:
-            mark_item(chosen.get("path",""), positive=False)
-            mark_tokens(tokenize(query_var.get()), positive=False)
+            engine.record_feedback(query_var.get(), chosen, positive=False)
             messagebox.showwarning("開啟失敗", "⚠️ 已記錄負向回饋")
             status.set("開啟失敗（+負向）")
 
@@ -84,8 +103,8 @@ def run_gui():
         if not sel: return
         idx = tree.index(sel[0])
         _, chosen = tree.results[idx]
-        mark_item(chosen.get("path",""), positive=True)
-        mark_tokens(tokenize(query_var.get()), positive=True)
+        flush_pending(chosen)
+        engine.record_feedback(query_var.get(), chosen, positive=True)
         status.set("標記 O（正向）完成")
 
     def mark_negative():
@@ -93,8 +112,7 @@ def run_gui():
         if not sel: return
         idx = tree.index(sel[0])
         _, chosen = tree.results[idx]
-        mark_item(chosen.get("path",""), positive=False)
-        mark_tokens(tokenize(query_var.get()), positive=False)
+        engine.record_feedback(query_var.get(), chosen, positive=False)
         status.set("標記 X（負向）完成")
 
     # 按鈕列
@@ -111,6 +129,11 @@ def run_gui():
     root.bind("o", lambda e: mark_positive())
     root.bind("x", lambda e: mark_negative())
 
+    def on_close():
+        flush_pending()
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
     root.mainloop()
 
 
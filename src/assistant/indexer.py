@@ -2,6 +2,7 @@ from __future__ import annotations
 import os, json, time, stat
 from typing import Iterator
 from .config import MAPPING_PATH, load_user_config
+from .feedback import prune_missing
 
 def iter_files() -> Iterator[dict]:
     cfg = load_user_config()
@@ -57,4 +58,6 @@ def ensure_index(force: bool = False) -> str:
         data = build_mapping()
         with open(MAPPING_PATH, "w", encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False)
+        # 索引重建後，順便清掉已經不存在的檔案的回饋紀錄
+        prune_missing(it["path"] for it in data["items"])
     return MAPPING_PATH
@@ -0,0 +1,65 @@
+"""
+每筆項目的靜態分數先驗（與 query 無關的部分）
+  prior = 新鮮度 × 路徑深度懲罰 × 項目偏置
+- 路徑深度只算一次；新鮮度、項目偏置用到才算（只有命中的候選會用到），結果快取到下一個分桶
+- 新鮮度按 FRESHNESS_BUCKET_SECONDS 分桶：跨桶只是把快取清掉，不會對每一筆 stat（雲端硬碟上很慢）
+- 偏置快照從磁碟重新載入（version 變了）或自己寫了回饋時清掉偏置快取
+- 項目本身的變動（mapping 重建、記憶點改寫）走整批重建：warmstart 快照會因來源檔變了而重算
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional
+
+from .feedback import get_bias_for_item_from_snapshot
+
+FRESHNESS_BUCKET_SECONDS = 3600.0
+
+
+class StaticPriors:
+    def __init__(self, items: List[Dict[str, Any]],
+                 freshness: Callable[[Dict[str, Any], float], float],
+                 depth: Callable[[Dict[str, Any]], float],
+                 path_of: Callable[[Dict[str, Any]], str],
+                 bucket_seconds: float = FRESHNESS_BUCKET_SECONDS):
+        self.items = items
+        self.freshness = freshness
+        self.path_of = path_of
+        self.bucket_seconds = bucket_seconds
+        self._depth = [depth(it) for it in items]
+        self._fresh: List[Optional[float]] = [None] * len(items)
+        self._bias: List[Optional[float]] = [None] * len(items)
+        self._snapshot: dict = {}
+        self._now = 0.0
+        self._bucket: Optional[int] = None
+        self._bias_version: Optional[int] = None
+
+    def _item_bias(self, i: int) -> float:
+        path = self.path_of(self.items[i])
+        return get_bias_for_item_from_snapshot(self._snapshot, path, self._now) if path else 1.0
+
+    def refresh(self, now: float, snapshot: dict, bias_version: int) -> None:
+        """查詢前呼叫；跨新鮮度分桶或偏置檔被別人改過時清掉快取，實際值等 value() 用到才算"""
+        bucket = int(now // self.bucket_seconds)
+        if bucket != self._bucket:
+            # 偏置也會隨時間衰減，跟著分桶重算
+            self._fresh = [None] * len(self.items)
+            self._bias = [None] * len(self.items)
+            self._bucket = bucket
+            self._now = now
+        elif bias_version != self._bias_version:
+            self._bias = [None] * len(self.items)
+        self._snapshot = snapshot
+        self._bias_version = bias_version
+
+    def value(self, i: int) -> float:
+        fresh = self._fresh[i]
+        if fresh is None:
+            fresh = self._fresh[i] = self.freshness(self.items[i], self._now)
+        bias = self._bias[i]
+        if bias is None:
+            bias = self._bias[i] = self._item_bias(i)
+        return fresh * self._depth[i] * bias
+
+    def rebase_bias(self, snapshot: dict) -> None:
+        """自己寫完回饋後換上新快照：寫入時的衰減/容量壓縮可能動到任何一筆，整批清掉偏置快取（用到再算）"""
+        self._snapshot = snapshot
+        self._bias = [None] * len(self.items)
@@ -0,0 +1,73 @@
+"""
+查詢紀錄（opt-in）：config.json 的 record_queries 或 CLI --record-queries 開啟
+每筆一行精簡 JSON：
+  ts 時間、e 引擎(memory/index)、q 查詢（空白收斂，保留大小寫）、k top_k、r 結果 path 列表、c 選中的 path（成功開啟或標記 O 才算）、ms 延遲
+檔案超過 MAX_BYTES 就輪替成 .1 .2 ...，最多保留 BACKUPS 份
+"""
+from __future__ import annotations
+import json, os, time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .config import QUERY_LOG_PATH, load_user_config
+
+MAX_BYTES = 1 << 20
+BACKUPS = 3
+
+def normalize_query(q: str) -> str:
+    # 只收斂空白、保留大小寫：tokenize 的駝峰切分看大小寫（GLPrefab -> gl/prefab），replay 才會重現原結果
+    return " ".join((q or "").split())
+
+def is_enabled(flag: bool = False) -> bool:
+    if flag:
+        return True
+    try:
+        return load_user_config().record_queries
+    except Exception:
+        return False
+
+def _rotate(path: str) -> None:
+    for i in range(BACKUPS - 1, 0, -1):
+        src = f"{path}.{i}"
+        if os.path.exists(src):
+            os.replace(src, f"{path}.{i + 1}")
+    os.replace(path, f"{path}.1")
+
+def record_query(query: str, top_k: int, results: List[Tuple[float, Dict[str, Any]]],
+                 latency_ms: float, engine: str, chosen: Optional[Dict[str, Any]] = None,
+                 path: str = QUERY_LOG_PATH) -> None:
+    entry = {
+        "ts": int(time.time()),
+        "e": engine,
+        "q": normalize_query(query),
+        "k": top_k,
+        "r": [it.get("path") or "" for _, it in results],
+        "c": (chosen.get("path") or "") if chosen else None,
+        "ms": round(latency_ms, 3),
+    }
+    line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+    # 紀錄失敗不能影響查詢本身
+    try:
+        if os.path.exists(path) and os.path.getsize(path) + len(line) > MAX_BYTES:
+            _rotate(path)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+    except OSError:
+        pass
+
+def log_files(path: str = QUERY_LOG_PATH) -> List[str]:
+    """舊到新：.N ... .1, 目前檔"""
+    files = [f"{path}.{i}" for i in range(BACKUPS, 0, -1)] + [path]
+    return [p for p in files if os.path.exists(p)]
+
+def iter_log(paths: List[str]) -> Iterator[Dict[str, Any]]:
+    for p in paths:
+        with open(p, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    continue
+                if e.get("q"):
+                    yield e
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+查詢紀錄重播（延遲回歸測試）
+  python -m assistant.replay [LOG ...] [--engine memory|index] [--repeat N] [--json]
+- 預設讀 query_log.jsonl 及其輪替檔；每筆用紀錄當時的引擎（或 --engine 指定）重跑
+- 報告 p50/p95/p99 延遲（重播 vs 紀錄）、Top-K 重疊率、被選中項目仍在 Top-K 的比例
+- 只查詢，不開啟、不寫回饋
+"""
+from __future__ import annotations
+import argparse
+import json
+import math
+import sys
+import time
+from typing import Any, Dict, List
+
+from assistant.batch import load_engine
+from assistant.querylog import iter_log, log_files
+
+
+def percentile(values: List[float], p: float) -> float:
+    """nearest-rank 百分位；空列表回傳 0"""
+    if not values:
+        return 0.0
+    vs = sorted(values)
+    k = max(0, min(len(vs) - 1, math.ceil(p / 100.0 * len(vs)) - 1))
+    return vs[k]
+
+
+def _latency_summary(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "mean": round(sum(values) / len(values), 3) if values else 0.0,
+    }
+
+
+def replay(entries: List[Dict[str, Any]], engine_kind: str | None = None, repeat: int = 1) -> Dict[str, Any]:
+    engines: Dict[str, Any] = {}
+    replay_ms: List[float] = []
+    recorded_ms: List[float] = []
+    overlaps: List[float] = []
+    chosen_total = chosen_kept = 0
+
+    for e in entries:
+        kind = engine_kind or e.get("e") or "memory"
+        if kind not in engines:
+            engines[kind] = load_engine(kind)
+        engine = engines[kind]
+        top_k = int(e.get("k") or 10)
+
+        for _ in range(max(1, repeat)):
+            t0 = time.perf_counter()
+            results = engine.search(e["q"], top_k=top_k)
+            replay_ms.append((time.perf_counter() - t0) * 1000.0)
+        if "ms" in e:
+            recorded_ms.append(float(e["ms"]))
+
+        got = [it.get("path") or "" for _, it in results]
+        rec = list(e.get("r") or [])
+        if rec:
+            overlaps.append(len(set(rec) & set(got)) / len(rec))
+        else:
+            overlaps.append(1.0 if not got else 0.0)
+        if e.get("c"):
+            chosen_total += 1
+            chosen_kept += e["c"] in got
+
+    return {
+        "queries": len(entries),
+        "replay_ms": _latency_summary(replay_ms),
+        "recorded_ms": _latency_summary(recorded_ms),
+        "topk_overlap": round(sum(overlaps) / len(overlaps), 4) if overlaps else 0.0,
+        "chosen_in_topk": round(chosen_kept / chosen_total, 4) if chosen_total else None,
+        "chosen_total": chosen_total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重播查詢紀錄，量測延遲與結果穩定度")
+    parser.add_argument("logs", nargs="*", help="紀錄檔（預設：query_log.jsonl 與輪替檔）")
+    parser.add_argument("--engine", choices=("memory", "index"), default=None,
+                        help="覆寫紀錄中的引擎")
+    parser.add_argument("--repeat", type=int, default=1, help="每筆重跑幾次（延遲取每次）")
+    parser.add_argument("--limit", type=int, default=None, help="最多重播幾筆")
+    parser.add_argument("--json", action="store_true", help="以 JSON 輸出報告")
+    args = parser.parse_args()
+
+    paths = args.logs or log_files()
+    if not paths:
+        print("找不到查詢紀錄；請先以 --record-queries 或 config.json 的 record_queries 開啟紀錄。")
+        sys.exit(1)
+
+    entries = list(iter_log(paths))
+    if args.limit is not None:
+        entries = entries[:args.limit]
+    if not entries:
+        print("查詢紀錄是空的。")
+        sys.exit(1)
+
+    report = replay(entries, engine_kind=args.engine, repeat=args.repeat)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    r, o = report["replay_ms"], report["recorded_ms"]
+    print(f"重播 {report['queries']} 筆查詢")
+    print(f"  延遲 (ms)  重播  p50={r['p50']:.3f}  p95={r['p95']:.3f}  p99={r['p99']:.3f}  mean={r['mean']:.3f}")
+    print(f"             紀錄  p50={o['p50']:.3f}  p95={o['p95']:.3f}  p99={o['p99']:.3f}  mean={o['mean']:.3f}")
+    print(f"  Top-K 重疊率：{report['topk_overlap']:.2%}")
+    if report["chosen_in_topk"] is not None:
+        print(f"  選中項目仍在 Top-K：{report['chosen_in_topk']:.2%}（{report['chosen_total']} 筆）")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,9 @@ SmartSearch (改良版)
 - 將偏置檔搬到使用者目錄 ~/.smart_desktop_assistant/smartsearch_bias.json
 - 搜尋時使用單次載入的偏置快照（避免每筆結果重讀檔）
 - 基本語意支援：斷詞、同義詞展開、簡單打分（字串重合 + 新鮮度 + 路徑深度 + 副檔名提示 + 偏置）
+- 偏置計數依時間衰減、有容量上限，記憶點已移除的 path 會在下次學習時清掉（規則同 assistant.feedback）
+- 打錯字容錯：對稱刪除詞彙索引找編輯距離 1~2 內的詞，修正詞打折計分
+- 新鮮度/深度/項目偏置算成每筆的靜態 prior（assistant.priors），只對命中的候選算一次並快取到下一個分桶
 """
 from __future__ import annotations
 import os
@@ -14,6 +17,14 @@ import time
 from typing import List, Tuple, Dict, Any
 from collections.abc import Iterable
 
+from assistant.config import load_user_config
+from assistant.feedback import (
+    BiasCache, bump, compact as compact_bias,
+    get_bias_for_tokens_from_snapshot,
+)
+from assistant.priors import StaticPriors
+from assistant.spelling import TypoIndex, unmatched_tokens, weighted_corrections, DEFAULT_MAX_EDIT_DISTANCE, DEFAULT_TYPO_PENALTY
+
 # -------------------------------
 # 路徑與偏置資料位置（使用者目錄）
 # -------------------------------
@@ -69,7 +80,7 @@ def expand_query(q: str) -> List[str]:
 # -------------------------------
 # 偏置：讀寫與快取
 # -------------------------------
-def _load_bias_all() -> Dict[str, Dict[str, Dict[str, int]]]:
+def _load_bias_all() -> Dict[str, Any]:
     if os.path.exists(BIAS_PATH):
         try:
             with open(BIAS_PATH, "r", encoding="utf-8") as f:
@@ -84,57 +95,45 @@ def _load_bias_all() -> Dict[str, Dict[str, Dict[str, int]]]:
             pass
     return {"item_bias": {}, "token_bias": {}}
 
-def _save_bias_all(d: Dict[str, Dict[str, Dict[str, int]]]) -> None:
+def _save_bias_all(d: Dict[str, Any]) -> None:
     tmp = BIAS_PATH + ".tmp"
     with open(tmp, "w", encoding="utf-8") as f:
         json.dump(d, f, ensure_ascii=False, indent=2)
     os.replace(tmp, BIAS_PATH)
 
-def _get_item_bias_from_snapshot(snapshot: dict, path: str) -> float:
-    e = snapshot.get("item_bias", {}).get(path)
-    if not e:
-        return 1.0
-    return (1.0 + int(e.get("pos", 0))) / (1.0 + int(e.get("neg", 0)))
+def _get_tokens_bias_from_snapshot(snapshot: dict, tokens: List[str], now: float | None = None) -> float:
+    return get_bias_for_tokens_from_snapshot(snapshot, tokens, now)
 
-def _get_tokens_bias_from_snapshot(snapshot: dict, tokens: List[str]) -> float:
-    tb = snapshot.get("token_bias", {})
-    pos = neg = 0
-    for t in tokens:
-        e = tb.get(t)
-        if e:
-            pos += int(e.get("pos", 0))
-            neg += int(e.get("neg", 0))
-    return (1.0 + pos) / (1.0 + neg)
+def _compact_bias(data: dict, valid_paths: Iterable[str] | None = None) -> dict:
+    cfg = load_user_config()
+    return compact_bias(data, cfg.bias_half_life_days, cfg.bias_max_items, cfg.bias_max_tokens, valid_paths)
 
-def _mark_item(path: str, positive: bool) -> None:
+def _mark_item(path: str, positive: bool, valid_paths: Iterable[str] | None = None) -> dict:
     data = _load_bias_all()
-    ib = data.setdefault("item_bias", {})
-    entry = ib.setdefault(path, {"pos": 0, "neg": 0})
-    if positive:
-        entry["pos"] = int(entry["pos"]) + 1
-    else:
-        entry["neg"] = int(entry["neg"]) + 1
+    bump(data.setdefault("item_bias", {}), path, positive, time.time(), load_user_config().bias_half_life_days)
+    data = _compact_bias(data, valid_paths)
     _save_bias_all(data)
+    return data
 
-def _mark_tokens(tokens: List[str], positive: bool) -> None:
+def _mark_tokens(tokens: List[str], positive: bool) -> dict:
     data = _load_bias_all()
     tb = data.setdefault("token_bias", {})
+    now, hl = time.time(), load_user_config().bias_half_life_days
     for t in tokens:
-        e = tb.setdefault(t, {"pos": 0, "neg": 0})
-        if positive:
-            e["pos"] = int(e["pos"]) + 1
-        else:
-            e["neg"] = int(e["neg"]) + 1
+        bump(tb, t, positive, now, hl)
+    data = _compact_bias(data)
     _save_bias_all(data)
+    return data
 
 # -------------------------------
 # 打分輔助
 # -------------------------------
-def _freshness_boost(path: str) -> float:
+def _freshness_boost(path: str, now: float | None = None) -> float:
     """根據檔案最近修改時間給輕微加權（不存在或錯誤則 1.0）"""
     try:
         mtime = os.path.getmtime(path)
-        days = max(0.0, (time.time() - mtime) / 86400.0)
+        now = time.time() if now is None else now
+        days = max(0.0, (now - mtime) / 86400.0)
         return 1.0 + 0.25 * math.exp(-days / 30.0)  # 30 天半衰期，最高 +25%
     except Exception:
         return 1.0
@@ -151,7 +150,20 @@ def _ext_bonus(path: str, tokens: List[str]) -> float:
     hints = {"dwg": 1.2, "pdf": 1.1, "xlsx": 1.05}
     return hints.get(ext, 1.1) if ext in tokens else 1.0
 
-def _text_haystack_of(item: dict) -> str:
+def _path_of(item: dict) -> str:
+    return (item.get("path") or "").strip()
+
+# 給 StaticPriors 用：沒有 path 的項目不加權
+def _item_freshness(item: dict, now: float) -> float:
+    path = _path_of(item)
+    return _freshness_boost(path, now) if path else 1.0
+
+def _item_depth(item: dict) -> float:
+    path = _path_of(item)
+    return _depth_penalty(path) if path else 1.0
+
+def _raw_haystack_of(item: dict) -> str:
+    # 保留原始大小寫：容錯索引的詞彙要靠 tokenize 的駝峰切分（GLPrefab -> gl/prefab）
     desc = item.get("description") or ""
     path = item.get("path") or ""
     name = item.get("name") or os.path.basename(path)
@@ -167,16 +179,22 @@ def _text_haystack_of(item: dict) -> str:
 
     trigger_text = " ".join(triggers_iterable)
     haystack_parts = [desc, name, path, parent, trigger_text]
-    haystack = " ".join(part for part in haystack_parts if part)
-    return haystack.lower()
+    return " ".join(part for part in haystack_parts if part)
 
-def _base_overlap_score(tokens: List[str], hay: str) -> float:
+def _text_haystack_of(item: dict) -> str:
+    return _raw_haystack_of(item).lower()
+
+def _base_overlap_score(tokens: List[str], hay: str, corrections: Dict[str, float] | None = None) -> float:
     score = 0.0
     for t in tokens:
         if not t:
             continue
         if t in hay:
             score += hay.count(t) * 1.0
+    # 修正詞（打錯字容錯）依編輯距離打折
+    for t, w in (corrections or {}).items():
+        if t in hay:
+            score += hay.count(t) * w
     return score
 
 # -------------------------------
@@ -189,33 +207,65 @@ class SmartSearch:
       - search(query, top_k=10) -> List[(score, item)]
       - learn_positive(query, item) / learn_negative(query, item)
     items: 你 load_memory() 回來的 list[dict]，需含至少 description/path/action 等欄位
+    typo_penalty: 修正詞每差一個編輯距離乘上的權重（0 表示關閉容錯）
+    物件可直接 pickle（assistant.warmstart 用它做暖啟動快照）
     """
-    def __init__(self, items: List[Dict[str, Any]]):
+    def __init__(self, items: List[Dict[str, Any]],
+                 typo_penalty: float = DEFAULT_TYPO_PENALTY,
+                 max_edit_distance: int = DEFAULT_MAX_EDIT_DISTANCE):
         self.items = items or []
+        self.typo_penalty = typo_penalty
+        self.max_edit_distance = max_edit_distance
+        self._hays = [_text_haystack_of(it) for it in self.items]
+        self._typo_index: TypoIndex | None = None
+        self._bias = BiasCache(BIAS_PATH, _load_bias_all)
+        self._priors = StaticPriors(self.items, _item_freshness, _item_depth, _path_of)
+
+    @property
+    def typo_index(self) -> TypoIndex:
+        if self._typo_index is None:
+            self._typo_index = TypoIndex.from_texts(
+                (_raw_haystack_of(it) for it in self.items), max_distance=self.max_edit_distance)
+        return self._typo_index
+
+    def warm(self):
+        """先把延遲建立的東西（容錯索引、偏置快照、靜態 prior）準備好"""
+        if self.typo_penalty > 0 and self.max_edit_distance > 0:
+            self.typo_index
+        self._priors.refresh(time.time(), self._bias.get(), self._bias.version)
+        return self
 
     def search(self, query: str, top_k: int = 10) -> List[Tuple[float, Dict[str, Any]]]:
-        # 1) 取得一次性的偏置快照（避免 O(n) 讀檔）
-        fb_snapshot = _load_bias_all()
+        # 1) 取得一次性的偏置快照（避免 O(n) 讀檔；檔案沒變就沿用上次解析的結果）
+        fb_snapshot = self._bias.get()
+        now = time.time()
+        # 新鮮度/深度/項目偏置：跨分桶或偏置檔被外部改過才清快取，命中的候選用到才重算
+        self._priors.refresh(now, fb_snapshot, self._bias.version)
+        prior = self._priors.value
 
         # 2) 查詢斷詞 + 同義展開
         expanded = expand_query(query)
         query_tokens = tokenize(" ".join(expanded))  # 合併後再斷一次
-        token_bias = _get_tokens_bias_from_snapshot(fb_snapshot, query_tokens)
+        token_bias = _get_tokens_bias_from_snapshot(fb_snapshot, query_tokens, now)
+        corrections: Dict[str, float] = {}
+        if self.typo_penalty > 0 and self.max_edit_distance > 0:
+            # 只修正使用者打的字；已經能命中某筆的 token 不算打錯。全都命中就不碰容錯索引（不必建）
+            typed = unmatched_tokens(tokenize(query), self._hays)
+            if typed:
+                corrections = weighted_corrections(
+                    self.typo_index, typed, self.typo_penalty, exclude=query_tokens)
 
         results: List[Tuple[float, Dict[str, Any]]] = []
-        for it in self.items:
-            hay = _text_haystack_of(it)
-            base = _base_overlap_score(query_tokens, hay)
+        for i in range(len(self.items)):
+            base = _base_overlap_score(query_tokens, self._hays[i], corrections)
             if base <= 0:
                 continue
 
-            path = (it.get("path") or "").strip()
-            s = base
+            it = self.items[i]
+            path = _path_of(it)
+            s = base * prior(i)
             if path:
-                s *= _freshness_boost(path)
-                s *= _depth_penalty(path)
                 s *= _ext_bonus(path, query_tokens)
-                s *= _get_item_bias_from_snapshot(fb_snapshot, path)
 
             s *= token_bias
             results.append((s, it))
@@ -223,10 +273,19 @@ class SmartSearch:
         results.sort(key=lambda x: x[0], reverse=True)
         return results[:top_k]
 
+    def _known_paths(self) -> List[str]:
+        return [(it.get("path") or "") for it in self.items]
+
+    def _learn(self, query: str, item: Dict[str, Any], positive: bool) -> None:
+        path = item.get("path") or ""
+        _mark_item(path, positive=positive, valid_paths=self._known_paths())
+        data = _mark_tokens(tokenize(query), positive=positive)
+        # 自己寫的回饋直接放回快取；壓縮/清除可能動到別筆的偏置，prior 的偏置部分整批作廢（用到再算）
+        self._bias.prime(data)
+        self._priors.rebase_bias(data)
+
     def learn_positive(self, query: str, item: Dict[str, Any]) -> None:
-        _mark_item((item.get("path") or ""), positive=True)
-        _mark_tokens(tokenize(query), positive=True)
+        self._learn(query, item, positive=True)
 
     def learn_negative(self, query: str, item: Dict[str, Any]) -> None:
-        _mark_item((item.get("path") or ""), positive=False)
-        _mark_tokens(tokenize(query), positive=False)
+        self._learn(query, item, positive=False)
@@ -3,7 +3,9 @@ import json, os, math, time
 from typing import List, Tuple, Dict, Any
 from .config import MAPPING_PATH
 from .semantics import tokenize, expand_query
-from .feedback import load_all, get_bias_for_item_from_snapshot, get_bias_for_tokens_from_snapshot
+from .feedback import BiasCache, get_bias_for_tokens_from_snapshot, mark_item, mark_tokens
+from .priors import StaticPriors
+from .spelling import TypoIndex, unmatched_tokens, weighted_corrections, DEFAULT_MAX_EDIT_DISTANCE, DEFAULT_TYPO_PENALTY
 
 def _load_mapping() -> dict:
     if not os.path.exists(MAPPING_PATH):
@@ -11,19 +13,26 @@ def _load_mapping() -> dict:
     with open(MAPPING_PATH, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def _base_score(tokens: list[str], item: dict) -> float:
-    # 名稱/路徑 的 token overlap
-    hay = (item.get("name","") + " " + item.get("path","") + " " + item.get("parent","")).lower()
+def _haystack(item: dict) -> str:
+    return item.get("name","") + " " + item.get("path","") + " " + item.get("parent","")
+
+def _base_score(tokens: list[str], hay: str, corrections: dict[str, float] | None = None) -> float:
+    # 名稱/路徑 的 token overlap（hay 已預先轉小寫）
     score = 0.0
     for t in tokens:
         if t in hay:
             # 出現越多次略加分
             score += hay.count(t) * 1.0
+    # 打錯字的修正詞：同樣算 overlap，但乘上懲罰權重
+    for t, w in (corrections or {}).items():
+        if t in hay:
+            score += hay.count(t) * w
     return score
 
-def _freshness_boost(item: dict) -> float:
+def _freshness_boost(item: dict, now: float | None = None) -> float:
     # 最近 30 天：+30% → 指數衰減
-    days = max(0.0, (time.time() - item.get("mtime", 0)) / 86400.0)
+    now = time.time() if now is None else now
+    days = max(0.0, (now - item.get("mtime", 0)) / 86400.0)
     return 1.0 + 0.3 * math.exp(-days / 30.0)
 
 def _depth_penalty(item: dict) -> float:
@@ -31,6 +40,9 @@ def _depth_penalty(item: dict) -> float:
     depth = item.get("path","").count(os.sep)
     return 1.0 / (1.0 + max(0, depth - 6) * 0.08)
 
+def _path_of(item: dict) -> str:
+    return item.get("path","")
+
 def _ext_bonus(item: dict, tokens: list[str]) -> float:
     # 若 query 有明確副檔名或類型線索（如 dwg, pdf），給些加成
     ext = (item.get("ext") or "").lstrip(".")
@@ -41,30 +53,74 @@ def _ext_bonus(item: dict, tokens: list[str]) -> float:
     return 1.0
 
 class SearchEngine:
-    def __init__(self):
-        self.mapping = _load_mapping()
+    # 物件可直接 pickle（assistant.warmstart 用它做暖啟動快照；容錯索引不入快照）
+    def __init__(self, typo_penalty: float = DEFAULT_TYPO_PENALTY,
+                 max_edit_distance: int = DEFAULT_MAX_EDIT_DISTANCE,
+                 mapping: dict | None = None):
+        self.mapping = _load_mapping() if mapping is None else mapping
         self.items = self.mapping.get("items", [])
+        self.typo_penalty = typo_penalty
+        self.max_edit_distance = max_edit_distance
+        self._hays = [_haystack(it).lower() for it in self.items]
+        self._typo_index: TypoIndex | None = None
+        self._bias = BiasCache()
+        # 與 query 無關的分數（新鮮度 × 深度 × 項目偏置），查詢時只乘上去
+        self._priors = StaticPriors(self.items, _freshness_boost, _depth_penalty, _path_of)
+
+    @property
+    def typo_index(self) -> TypoIndex:
+        # 第一次查詢才建，之後重用
+        if self._typo_index is None:
+            self._typo_index = TypoIndex.from_texts(
+                (_haystack(it) for it in self.items), max_distance=self.max_edit_distance)
+        return self._typo_index
+
+    def __getstate__(self):
+        # 容錯索引比 mapping 本身還大，放進快照反而比冷啟動慢；有 query 真的需要修正時再建
+        state = self.__dict__.copy()
+        state["_typo_index"] = None
+        return state
+
+    def warm(self):
+        """先把偏置快照、靜態 prior 準備好（容錯索引不預建，見 __getstate__）"""
+        self._priors.refresh(time.time(), self._bias.get(), self._bias.version)
+        return self
 
     def search(self, query: str, top_k: int = 15):
         # 1) 先拿一份快照 → 這次搜尋過程只用這份，不重複讀檔
-        fb_snapshot = load_all()
+        fb_snapshot = self._bias.get()
+        now = time.time()
+        self._priors.refresh(now, fb_snapshot, self._bias.version)
+        prior = self._priors.value
 
         expanded = expand_query(query)
         query_tokens = tokenize(" ".join(expanded))
-        token_bias = get_bias_for_tokens_from_snapshot(fb_snapshot, query_tokens)
+        token_bias = get_bias_for_tokens_from_snapshot(fb_snapshot, query_tokens, now)
+        corrections = {}
+        if self.typo_penalty > 0 and self.max_edit_distance > 0:
+            # 只修正使用者打的字；已經能命中某筆的 token 不算打錯。全都命中就不碰容錯索引（不必建）
+            typed = unmatched_tokens(tokenize(query), self._hays)
+            if typed:
+                corrections = weighted_corrections(
+                    self.typo_index, typed, self.typo_penalty, exclude=query_tokens)
 
         scored = []
-        for it in self.items:
-            base = _base_score(query_tokens, it)
+        for i in range(len(self.items)):
+            base = _base_score(query_tokens, self._hays[i], corrections)
             if base <= 0:
                 continue
-            s = base
-            s *= _freshness_boost(it)
-            s *= _depth_penalty(it)
+            it = self.items[i]
+            s = base * prior(i)
             s *= _ext_bonus(it, query_tokens)
-            s *= get_bias_for_item_from_snapshot(fb_snapshot, it.get("path",""))
             s *= token_bias
             scored.append((s, it))
 
         scored.sort(key=lambda x: x[0], reverse=True)
         return scored[:top_k]
+
+    def record_feedback(self, query: str, item: dict, positive: bool) -> None:
+        """寫入正/負回饋；壓縮可能動到別筆的偏置，prior 的偏置部分整批作廢（用到再算）"""
+        mark_item(item.get("path",""), positive)
+        data = mark_tokens(tokenize(query), positive)
+        self._bias.prime(data)
+        self._priors.rebase_bias(data)
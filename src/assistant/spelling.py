@@ -0,0 +1,178 @@
+"""
+容錯比對：SymSpell 風格的「對稱刪除」詞彙索引
+- 詞彙來源：semantics.tokenize 對 mapping / 記憶點切出來的 token
+- 建索引時對每個詞做 1..N 次刪除，存成 delete -> {詞}；查詢時對 query token 做同樣刪除再查表
+- 候選再用 Damerau (OSA) 距離驗證，只回傳最近距離那一層
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .semantics import SPLIT_RE, tokenize, expand_query
+
+DEFAULT_MAX_EDIT_DISTANCE = 2
+DEFAULT_TYPO_PENALTY = 0.6   # 每差一個編輯距離，分數乘一次
+PREFIX_LENGTH = 7            # 只對前綴做刪除，長路徑名也不會爆量
+MIN_TOKEN_LEN = 2            # 單字元不做修正（中文逐字也在這裡被排除）
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    out: Set[str] = set()
+    frontier = {word}
+    for _ in range(max_distance):
+        nxt: Set[str] = set()
+        for w in frontier:
+            if len(w) <= 1:
+                continue
+            for i in range(len(w)):
+                d = w[:i] + w[i + 1:]
+                if d not in out:
+                    nxt.add(d)
+        out |= nxt
+        frontier = nxt
+    return out
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """OSA 距離（允許相鄰對調）；超過 limit 直接回傳 limit + 1"""
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        row_min = cur[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            v = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                v = min(v, prev2[j - 2] + 1)
+            cur[j] = v
+            row_min = min(row_min, v)
+        if row_min > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1] if prev[-1] <= limit else limit + 1
+
+
+def max_distance_for(token: str, max_distance: int) -> int:
+    # 短詞容錯收斂：≤4 字元最多 1，避免 "05" 被改成一堆不相干的數字
+    if len(token) <= 4:
+        return min(1, max_distance)
+    return max_distance
+
+
+class TypoIndex:
+    """
+    對稱刪除索引：
+      - TypoIndex.from_texts(texts) / add_text(text) / add_token(tok)
+      - lookup(token) -> [(詞, 距離)]，只回傳最近距離的那一層
+      - correct(tokens) -> [(修正詞, 距離)]，已在詞彙內的 token 不修正
+    """
+    def __init__(self, max_distance: int = DEFAULT_MAX_EDIT_DISTANCE, prefix_length: int = PREFIX_LENGTH):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.vocab: Dict[str, int] = {}          # 詞 -> 出現次數
+        self.deletes: Dict[str, List[str]] = {}  # 刪除變體 -> 詞
+
+    @classmethod
+    def from_texts(cls, texts: Iterable[str], **kwargs) -> "TypoIndex":
+        idx = cls(**kwargs)
+        # 同一段（資料夾名、檔名）在 haystack 和其他路徑裡一再出現：每段只斷一次詞，結果與逐筆 add_text 相同
+        chunk_tokens: Dict[str, List[str]] = {}
+        for text in texts:
+            seen: Set[str] = set()
+            for chunk in SPLIT_RE.split(text):
+                if not chunk:
+                    continue
+                toks = chunk_tokens.get(chunk)
+                if toks is None:
+                    toks = chunk_tokens[chunk] = tokenize(chunk)
+                for tok in toks:
+                    if tok not in seen:
+                        seen.add(tok)
+                        idx.add_token(tok)
+        return idx
+
+    def add_text(self, text: str) -> None:
+        for tok in tokenize(text):
+            self.add_token(tok)
+
+    def add_token(self, tok: str) -> None:
+        if tok in self.vocab:
+            self.vocab[tok] += 1
+            return
+        self.vocab[tok] = 1
+        if len(tok) < MIN_TOKEN_LEN:
+            return
+        key = tok[:self.prefix_length]
+        for d in _deletes(key, self.max_distance) | {key}:
+            self.deletes.setdefault(d, []).append(tok)
+
+    def lookup(self, token: str) -> List[Tuple[str, int]]:
+        if len(token) < MIN_TOKEN_LEN or token in self.vocab:
+            return []
+        # 兩個字母的詞改一個字幾乎能對上任何東西（no -> to/go/on），不修；數字對調（50 -> 05）保留
+        if len(token) == 2 and token.isalpha():
+            return []
+        limit = max_distance_for(token, self.max_distance)
+        key = token[:self.prefix_length]
+        seen: Set[str] = set()
+        best = limit + 1
+        found: List[Tuple[str, int]] = []
+        for d in _deletes(key, limit) | {key}:
+            for cand in self.deletes.get(d, ()):
+                if cand in seen:
+                    continue
+                seen.add(cand)
+                dist = edit_distance(token, cand, min(limit, best))
+                if dist > limit:
+                    continue
+                if dist < best:
+                    best = dist
+                    found = [(cand, dist)]
+                elif dist == best:
+                    found.append((cand, dist))
+        found.sort(key=lambda x: -self.vocab[x[0]])
+        return found
+
+    def correct(self, tokens: Iterable[str]) -> List[Tuple[str, int]]:
+        tokens = list(tokens)
+        present = set(tokens)
+        out: List[Tuple[str, int]] = []
+        for t in tokens:
+            for cand, dist in self.lookup(t):
+                if cand not in present:
+                    present.add(cand)
+                    out.append((cand, dist))
+        return out
+
+
+def typo_weight(distance: int, penalty: float) -> float:
+    return penalty ** distance
+
+
+def unmatched_tokens(typed: Iterable[str], hays: List[str]) -> List[str]:
+    """使用者輸入的 token 裡，連子字串都命中不了任何一筆的（只有這些需要修正）"""
+    return [t for t in typed if not any(t in h for h in hays)]
+
+
+def weighted_corrections(index: TypoIndex, typed: List[str], penalty: float,
+                         exclude: Iterable[str] = ()) -> Dict[str, float]:
+    """
+    使用者實際輸入的 token（tokenize(query)，不含同義展開）的修正詞 -> 權重；
+    修正詞本身也做同義展開（perfab -> prefab -> 預製圖 …）
+    - typed 應先經 unmatched_tokens 過濾：已經能命中某筆的 token 不算打錯
+    - exclude（通常是展開後的 query tokens）裡的詞已經照常計分，不重複給分
+    """
+    present = set(typed) | set(exclude)
+    out: Dict[str, float] = {}
+    for cand, dist in index.correct(typed):
+        w = typo_weight(dist, penalty)
+        for t in tokenize(" ".join(expand_query(cand))):
+            if t in present:
+                continue
+            if w > out.get(t, 0.0):
+                out[t] = w
+    return out
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+暖啟動快照
+- 把整理好的搜尋狀態（正規化 items、小寫 haystack、偏置快照、靜態 prior）整個 pickle 起來，
+  下次啟動一次讀檔就能用，不必再 load_memory / json.load mapping / 重建索引
+- 記憶點的容錯索引很小，一起放進快照；電腦索引的容錯索引比 mapping 還大，不入快照，第一次需要修正時才建
+- 快照帶版本號，並記錄來源檔（資料 + 引擎及其相依模組的原始碼）的 (mtime, size)；任何一個變了就重建
+- 偏置檔不列入來源：引擎內的 BiasCache 每次查詢前自己比對 (mtime, size)
+- 快照只放在使用者目錄，讀寫失敗一律退回冷啟動
+
+  python -m assistant.warmstart --rebuild            # 重建兩份快照
+  python -m assistant.warmstart --check-budget 預製圖  # 量測冷程序 `python -m assistant <query>` 的耗時
+  python -m assistant.warmstart --compare            # 比較兩個引擎 讀快照 vs 冷載入（json + 建構）的耗時
+"""
+from __future__ import annotations
+import argparse
+import os
+import pickle
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from assistant.config import MAPPING_PATH, WARM_INDEX_PATH, WARM_MEMORY_PATH, file_signature
+
+SNAPSHOT_VERSION = 2
+STARTUP_BUDGET_MS = 300.0  # `python -m assistant <query>` 從冷程序到印出結果的目標上限
+
+
+def _signatures(sources: List[str]) -> Dict[str, Any]:
+    return {p: file_signature(p) for p in sources}
+
+
+def _read(path: str, sources: List[str]):
+    try:
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(state, dict) or state.get("version") != SNAPSHOT_VERSION:
+        return None
+    if state.get("sources") != _signatures(sources):
+        return None
+    return state.get("engine")
+
+
+def _write(path: str, engine, sigs: Dict[str, Any]) -> None:
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump({"version": SNAPSHOT_VERSION, "sources": sigs, "engine": engine},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _code_sources() -> List[str]:
+    """快照裡的物件是這些模組建出來的（容錯索引、斷詞、prior、偏置快取）；改了任何一個都要重建"""
+    from assistant import feedback, priors, semantics, spelling
+    return [m.__file__ for m in (spelling, semantics, priors, feedback)]
+
+
+def _memory_sources() -> List[str]:
+    from assistant.memory import memory_manager
+    from assistant.search import smart_search
+    return [memory_manager.MEMORY_JSON, memory_manager.__file__, smart_search.__file__, *_code_sources()]
+
+
+def _index_sources() -> List[str]:
+    from assistant import search_engine
+    return [MAPPING_PATH, search_engine.__file__, *_code_sources()]
+
+
+def load_smart_search(rebuild: bool = False, stats: Optional[dict] = None):
+    """記憶點 + SmartSearch；快照有效就直接用"""
+    sources = _memory_sources()
+    engine = None if rebuild else _read(WARM_MEMORY_PATH, sources)
+    if stats is not None:
+        stats["warm"] = engine is not None
+    if engine is not None:
+        return engine
+
+    from assistant.memory.memory_manager import load_memory
+    from assistant.search.smart_search import SmartSearch
+    sigs = _signatures(sources)  # 先記錄再讀，讀的途中被改也只會讓下次重建
+    engine = SmartSearch(load_memory()).warm()
+    _write(WARM_MEMORY_PATH, engine, sigs)
+    return engine
+
+
+def load_search_engine(rebuild: bool = False, stats: Optional[dict] = None):
+    """Computer_mapping.json + SearchEngine；快照有效就直接用"""
+    sources = _index_sources()
+    engine = None if rebuild else _read(WARM_INDEX_PATH, sources)
+    if stats is not None:
+        stats["warm"] = engine is not None
+    if engine is not None:
+        return engine
+
+    from assistant.search_engine import SearchEngine
+    sigs = _signatures(sources)
+    engine = SearchEngine().warm()
+    _write(WARM_INDEX_PATH, engine, sigs)
+    return engine
+
+
+def measure_cold_start(query: List[str], runs: int = 5) -> List[float]:
+    """開新程序跑 `python -m assistant <query>`（stdin 直接 Enter 跳過開啟），回傳每次耗時 ms"""
+    import subprocess
+    cmd = [sys.executable, "-m", "assistant", *query]
+    # 先跑一次，確保快照已建好；量的是日常的暖快照冷程序
+    subprocess.run(cmd, input="\n", text=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    out: List[float] = []
+    for _ in range(max(1, runs)):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, input="\n", text=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        out.append((time.perf_counter() - t0) * 1000.0)
+    return out
+
+
+def _median_ms(fn, runs: int) -> float:
+    times = []
+    for _ in range(max(1, runs)):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return sorted(times)[len(times) // 2]
+
+
+def measure_warm_vs_cold(runs: int = 5) -> Dict[str, Tuple[float, float]]:
+    """每個引擎回傳 (冷載入 ms, 讀快照 ms) 的中位數；冷載入 = 讀來源 json + 建構引擎"""
+    from assistant.memory.memory_manager import load_memory
+    from assistant.search.smart_search import SmartSearch
+    from assistant.search_engine import SearchEngine
+    cases = (
+        ("memory", lambda: SmartSearch(load_memory()), load_smart_search),
+        ("index", SearchEngine, load_search_engine),
+    )
+    out: Dict[str, Tuple[float, float]] = {}
+    for name, cold, warm in cases:
+        warm()  # 確保快照已建好
+        out[name] = (_median_ms(cold, runs), _median_ms(warm, runs))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="暖啟動快照：重建 / 量測啟動耗時")
+    parser.add_argument("--rebuild", action="store_true", help="重建記憶點與電腦索引的快照")
+    parser.add_argument("--check-budget", nargs="+", metavar="QUERY",
+                        help="量測 `python -m assistant QUERY` 冷程序耗時，中位數超過預算則回傳 1")
+    parser.add_argument("--compare", action="store_true", help="比較讀快照與冷載入（json + 建構）的耗時")
+    parser.add_argument("--runs", type=int, default=5, help="量測次數")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS, help="啟動預算（ms）")
+    args = parser.parse_args()
+
+    if not (args.rebuild or args.check_budget or args.compare):
+        parser.print_help()
+        return
+
+    if args.rebuild:
+        for name, loader in (("memory", load_smart_search), ("index", load_search_engine)):
+            t0 = time.perf_counter()
+            engine = loader(rebuild=True)
+            print(f"{name}: {len(engine.items)} 筆，{(time.perf_counter() - t0) * 1000.0:.0f} ms")
+
+    if args.compare:
+        for name, (cold_ms, warm_ms) in measure_warm_vs_cold(args.runs).items():
+            print(f"{name}: 冷載入 {cold_ms:.1f} ms，讀快照 {warm_ms:.1f} ms（{cold_ms / max(warm_ms, 1e-3):.1f}x）")
+
+    if args.check_budget:
+        times = sorted(measure_cold_start(args.check_budget, args.runs))
+        median = times[len(times) // 2]
+        verdict = "OK" if median <= args.budget_ms else "超出預算"
+        print(f"啟動耗時 (ms)：min={times[0]:.0f}  median={median:.0f}  max={times[-1]:.0f}  "
+              f"預算={args.budget_ms:.0f} → {verdict}")
+        if median > args.budget_ms:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()